@@ -1,274 +1,457 @@
 """
 Core image processing functions for retro-style image conversion.
 Includes dithering algorithms, color quantization, and palette matching.
+
+The processing pipeline is a set of stateless module-level functions working
+on int16 pixel arrays and (n, 3) int16 palette arrays. RetroImageProcessor is
+kept as a thin object wrapper around them for existing callers.
 """
 
 import numpy as np
 from PIL import Image, ImageEnhance
+from numba import njit
 from typing import List, Tuple, Optional
+import functools
 import math
 
 
-class RetroImageProcessor:
-    """Main class for processing images into retro/Game Boy camera style."""
+# Bits per channel used to index the nearest-color lookup table
+LUT_BITS = 6
+LUT_SHIFT = 8 - LUT_BITS
+
+# ITU-R BT.601 luma weights (x1000) for the color distance metric
+WEIGHT_R, WEIGHT_G, WEIGHT_B = 299, 587, 114
+
+# Game Boy Camera 4-shade grayscale palette
+GAMEBOY_PALETTE = np.array([
+    (15, 56, 15),    # Dark green (black)
+    (48, 98, 48),    # Medium-dark green
+    (139, 172, 15),  # Medium-light green
+    (155, 188, 15)   # Light green (white)
+], dtype=np.int16)
+
+# Classic dot matrix printer palette (black and white)
+DOT_MATRIX_PALETTE = np.array([
+    (0, 0, 0),       # Black
+    (255, 255, 255)  # White
+], dtype=np.int16)
+
+# Retro computer palettes
+CGA_PALETTE = np.array([
+    (0, 0, 0),       # Black
+    (0, 0, 170),     # Blue
+    (0, 170, 0),     # Green
+    (0, 170, 170),   # Cyan
+    (170, 0, 0),     # Red
+    (170, 0, 170),   # Magenta
+    (170, 85, 0),    # Brown
+    (170, 170, 170), # Light gray
+    (85, 85, 85),    # Dark gray
+    (85, 85, 255),   # Light blue
+    (85, 255, 85),   # Light green
+    (85, 255, 255),  # Light cyan
+    (255, 85, 85),   # Light red
+    (255, 85, 255),  # Light magenta
+    (255, 255, 85),  # Yellow
+    (255, 255, 255)  # White
+], dtype=np.int16)
+
+# Apple II palette
+APPLE_II_PALETTE = np.array([
+    (0, 0, 0),       # Black
+    (114, 38, 64),   # Dark red
+    (64, 51, 127),   # Dark blue
+    (228, 52, 254),  # Purple
+    (14, 89, 64),    # Dark green
+    (128, 128, 128), # Gray
+    (27, 154, 254),  # Medium blue
+    (191, 179, 255), # Light blue
+    (64, 76, 0),     # Brown
+    (228, 101, 1),   # Orange
+    (128, 128, 128), # Gray 2
+    (241, 166, 191), # Pink
+    (27, 203, 1),    # Green
+    (191, 204, 128), # Yellow
+    (141, 217, 191), # Aqua
+    (255, 255, 255)  # White
+], dtype=np.int16)
+
+# Commodore 64 palette
+C64_PALETTE = np.array([
+    (0, 0, 0),       # Black
+    (255, 255, 255), # White
+    (136, 0, 0),     # Red
+    (170, 255, 238), # Cyan
+    (204, 68, 204),  # Purple
+    (0, 204, 85),    # Green
+    (0, 0, 170),     # Blue
+    (238, 238, 119), # Yellow
+    (221, 136, 85),  # Orange
+    (102, 68, 0),    # Brown
+    (255, 119, 119), # Light red
+    (51, 51, 51),    # Dark gray
+    (119, 119, 119), # Medium gray
+    (170, 255, 102), # Light green
+    (0, 136, 255),   # Light blue
+    (187, 187, 187)  # Light gray
+], dtype=np.int16)
+
+# ZX Spectrum palette
+ZX_SPECTRUM_PALETTE = np.array([
+    (0, 0, 0),       # Black
+    (0, 0, 192),     # Blue
+    (192, 0, 0),     # Red
+    (192, 0, 192),   # Magenta
+    (0, 192, 0),     # Green
+    (0, 192, 192),   # Cyan
+    (192, 192, 0),   # Yellow
+    (192, 192, 192), # White
+    (0, 0, 0),       # Bright black
+    (0, 0, 255),     # Bright blue
+    (255, 0, 0),     # Bright red
+    (255, 0, 255),   # Bright magenta
+    (0, 255, 0),     # Bright green
+    (0, 255, 255),   # Bright cyan
+    (255, 255, 0),   # Bright yellow
+    (255, 255, 255)  # Bright white
+], dtype=np.int16)
+
+# Palettes selectable by name for the retro color style
+RETRO_PALETTES = {
+    'cga': CGA_PALETTE,
+    'apple2': APPLE_II_PALETTE,
+    'c64': C64_PALETTE,
+    'spectrum': ZX_SPECTRUM_PALETTE
+}
+
+AVAILABLE_PALETTES = {
+    'cga': 'IBM CGA 16-color palette',
+    'apple2': 'Apple II 16-color palette',
+    'c64': 'Commodore 64 16-color palette',
+    'spectrum': 'ZX Spectrum 16-color palette'
+}
+
+BAYER_4X4 = np.array([
+    [0, 8, 2, 10],
+    [12, 4, 14, 6],
+    [3, 11, 1, 9],
+    [15, 7, 13, 5]
+]) / 16.0
+
+# Bayer thresholds as signed offsets in 8-bit units
+BAYER_THRESHOLD_I16 = (BAYER_4X4 * 256).astype(np.int16) - 128
+
+
+def _to_soa(palette_np: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Split a palette into planar int16 R, G and B arrays."""
+    pal = np.asarray(palette_np, dtype=np.int16)
+    return (np.ascontiguousarray(pal[:, 0]),
+            np.ascontiguousarray(pal[:, 1]),
+            np.ascontiguousarray(pal[:, 2]))
+
+
+def _nearest_indices(pixels: np.ndarray, pal_soa: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> np.ndarray:
+    """Return the index of the closest palette color for each (r, g, b) row in pixels."""
+    pr, pg, pb = pal_soa
+    dr = pixels[:, 0, None].astype(np.int32) - pr
+    dg = pixels[:, 1, None].astype(np.int32) - pg
+    db = pixels[:, 2, None].astype(np.int32) - pb
+    dist = WEIGHT_R * dr * dr + WEIGHT_G * dg * dg + WEIGHT_B * db * db
+    return dist.argmin(1)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_lut(palette_key: bytes, bits: int = LUT_BITS) -> np.ndarray:
+    """Build a (2**bits)^3 table of nearest palette indices, sampled at bin centres."""
+    size = 1 << bits
+    shift = 8 - bits
+    levels = (np.arange(size, dtype=np.int32) << shift) + ((1 << shift) >> 1)
+    grid = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1).reshape(-1, 3)
+    palette_np = np.frombuffer(palette_key, dtype=np.int16).reshape(-1, 3)
+    idx = _nearest_indices(grid, _to_soa(palette_np))
+    return idx.astype(np.uint8).reshape(size, size, size)
+
+
+def _palette_lut(palette_np: np.ndarray) -> np.ndarray:
+    """Return the cached nearest-color lookup table for a palette array."""
+    return _build_lut(np.ascontiguousarray(palette_np, dtype=np.int16).tobytes())
+
+
+@njit('void(int16[:,:,::1], int16[::1], int16[::1], int16[::1], uint8[:,:,::1], boolean, uint8[:,::1])', cache=True, nogil=True)
+def _fs_dither_nb(img, pal_r, pal_g, pal_b, lut, serpentine, out):
+    """Floyd-Steinberg error diffusion over a contiguous int16 image, writing palette indices to out."""
+    height, width = img.shape[0], img.shape[1]
+    for y in range(height):
+        # Serpentine scan walks odd rows right-to-left with mirrored weights
+        step = -1 if serpentine and (y & 1) else 1
+        for i in range(width):
+            x = width - 1 - i if step < 0 else i
+            ahead = x + step
+            behind = x - step
+            
+            # Clamp so accumulated error stays bounded and indexes the table
+            r = min(max(img[y, x, 0], 0), 255)
+            g = min(max(img[y, x, 1], 0), 255)
+            b = min(max(img[y, x, 2], 0), 255)
+            best = lut[r >> LUT_SHIFT, g >> LUT_SHIFT, b >> LUT_SHIFT]
+            
+            out[y, x] = best
+            nr = pal_r[best]
+            ng = pal_g[best]
+            nb = pal_b[best]
+            
+            # Distribute error to neighboring pixels in sixteenths, rounding each
+            # share to nearest so the shift does not bias the output darker
+            for c in range(3):
+                error = np.int32((r, g, b)[c]) - (nr, ng, nb)[c]
+                if 0 <= ahead < width:
+                    img[y, ahead, c] += (error * 7 + 8) >> 4
+                if y + 1 < height:
+                    if 0 <= behind < width:
+                        img[y + 1, behind, c] += (error * 3 + 8) >> 4
+                    img[y + 1, x, c] += (error * 5 + 8) >> 4
+                    if 0 <= ahead < width:
+                        img[y + 1, ahead, c] += (error + 8) >> 4
+
+
+def resize_image(image: Image.Image, target_width: int, target_height: Optional[int] = None, maintain_aspect: bool = True, quality: str = 'fast') -> Image.Image:
+    """Resize image to target dimensions; quality='high' uses Lanczos resampling."""
+    if target_height is None:
+        if maintain_aspect:
+            aspect_ratio = image.height / image.width
+            target_height = int(target_width * aspect_ratio)
+        else:
+            target_height = target_width
+    
+    if target_width <= 0 or target_height <= 0:
+        raise ValueError(f"Target size must be positive, got {target_width}x{target_height}")
+    
+    if quality == 'high':
+        return image.resize((target_width, target_height), Image.LANCZOS)
+    
+    # Box-reduce large downscales by an integer factor before the final bilinear pass
+    x_factor = image.width // target_width
+    y_factor = image.height // target_height
+    if max(x_factor, y_factor) >= 4 and image.mode not in ('P', '1') and not image.mode.startswith('I;16'):
+        image = image.reduce((max(x_factor, 1), max(y_factor, 1)))
+    
+    return image.resize((target_width, target_height), Image.BILINEAR)
+
+
+@functools.lru_cache(maxsize=None)
+def _contrast_lut(factor: float, mean: int) -> Tuple[int, ...]:
+    """Return a 256-entry table scaling levels away from mean by factor."""
+    return tuple(max(0, min(255, int((i - mean) * factor + mean))) for i in range(256))
+
+
+def _luma_pivot(channel_means: np.ndarray) -> int:
+    """Return the rounded mean luminance ImageEnhance.Contrast pivots around."""
+    return int(channel_means[:3] @ np.array([0.299, 0.587, 0.114]) + 0.5)
+
+
+def enhance_contrast(image: Image.Image, factor: float = 1.5) -> Image.Image:
+    """Enhance image contrast for better dithering results."""
+    if image.mode not in ('L', 'RGB', 'RGBA'):
+        return ImageEnhance.Contrast(image).enhance(factor)
+    
+    # Pivot on the rounded mean luminance like ImageEnhance.Contrast, taken from the histogram
+    hist = np.array(image.histogram()).reshape(-1, 256)
+    channel_means = (hist * np.arange(256)).sum(1) / hist.sum(1)
+    if image.mode == 'L':
+        mean = int(channel_means[0] + 0.5)
+    else:
+        mean = _luma_pivot(channel_means)
+    
+    # One point() pass per image; alpha passes through unchanged
+    lut = list(_contrast_lut(factor, mean))
+    if image.mode == 'RGB':
+        lut = lut * 3
+    elif image.mode == 'RGBA':
+        lut = lut * 3 + list(range(256))
+    return image.point(lut)
+
+
+def apply_contrast(img_arr: np.ndarray, factor: float) -> np.ndarray:
+    """Scale int16 pixels away from the mean grey level, matching ImageEnhance.Contrast."""
+    if factor == 1.0:
+        return img_arr
     
-    # Game Boy Camera 4-shade grayscale palette
-    GAMEBOY_PALETTE = [
-        (15, 56, 15),    # Dark green (black)
-        (48, 98, 48),    # Medium-dark green
-        (139, 172, 15),  # Medium-light green
-        (155, 188, 15)   # Light green (white)
-    ]
+    # Same pivot and cached table as enhance_contrast, applied with one gather
+    mean = _luma_pivot(img_arr.reshape(-1, 3).mean(0))
+    lut = np.array(_contrast_lut(factor, mean), dtype=np.int16)
+    return np.take(lut, img_arr)
+
+
+def image_to_array(image: Image.Image, contrast_factor: float = 1.0) -> np.ndarray:
+    """Convert an image to a contiguous (H, W, 3) int16 array with contrast applied."""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
     
-    # Classic dot matrix printer palette (black and white)
-    DOT_MATRIX_PALETTE = [
-        (0, 0, 0),       # Black
-        (255, 255, 255)  # White
-    ]
+    img_arr = np.ascontiguousarray(np.array(image), dtype=np.int16)
+    return apply_contrast(img_arr, contrast_factor)
+
+
+def to_indexed_image(idx: np.ndarray, palette_np: np.ndarray) -> Image.Image:
+    """Wrap an (H, W) uint8 array of palette indices as a 'P' mode image."""
+    result = Image.fromarray(idx, 'P')
+    result.putpalette(np.asarray(palette_np).ravel().tolist())
+    return result
+
+
+def floyd_steinberg_dither(img_arr: np.ndarray, palette_np: np.ndarray, serpentine: bool = True) -> np.ndarray:
+    """Apply Floyd-Steinberg dithering, returning an (H, W) uint8 array of palette indices.
     
-    # Retro computer palettes
-    CGA_PALETTE = [
-        (0, 0, 0),       # Black
-        (0, 0, 170),     # Blue
-        (0, 170, 0),     # Green
-        (0, 170, 170),   # Cyan
-        (170, 0, 0),     # Red
-        (170, 0, 170),   # Magenta
-        (170, 85, 0),    # Brown
-        (170, 170, 170), # Light gray
-        (85, 85, 85),    # Dark gray
-        (85, 85, 255),   # Light blue
-        (85, 255, 85),   # Light green
-        (85, 255, 255),  # Light cyan
-        (255, 85, 85),   # Light red
-        (255, 85, 255),  # Light magenta
-        (255, 255, 85),  # Yellow
-        (255, 255, 255)  # White
-    ]
+    img_arr must be a contiguous int16 array; it is used as the error buffer and modified in place.
+    """
+    idx = np.empty(img_arr.shape[:2], dtype=np.uint8)
+    _fs_dither_nb(img_arr, *_to_soa(palette_np), _palette_lut(palette_np), serpentine, idx)
+    return idx
+
+
+@functools.lru_cache(maxsize=None)
+def _build_clustered_dot(n: int) -> np.ndarray:
+    """Build an n x n clustered-dot threshold matrix as int16 offsets in 8-bit units.
     
-    # Apple II palette
-    APPLE_II_PALETTE = [
-        (0, 0, 0),       # Black
-        (114, 38, 64),   # Dark red
-        (64, 51, 127),   # Dark blue
-        (228, 52, 254),  # Purple
-        (14, 89, 64),    # Dark green
-        (128, 128, 128), # Gray
-        (27, 154, 254),  # Medium blue
-        (191, 179, 255), # Light blue
-        (64, 76, 0),     # Brown
-        (228, 101, 1),   # Orange
-        (128, 128, 128), # Gray 2
-        (241, 166, 191), # Pink
-        (27, 203, 1),    # Green
-        (191, 204, 128), # Yellow
-        (141, 217, 191), # Aqua
-        (255, 255, 255)  # White
-    ]
+    Cells are ranked by distance from the centre (ties broken by angle), so
+    thresholds grow outward in a spiral and dots cluster like a halftone screen.
+    """
+    if n < 2:
+        raise ValueError(f"matrix_size must be at least 2, got {n}")
     
-    # Commodore 64 palette
-    C64_PALETTE = [
-        (0, 0, 0),       # Black
-        (255, 255, 255), # White
-        (136, 0, 0),     # Red
-        (170, 255, 238), # Cyan
-        (204, 68, 204),  # Purple
-        (0, 204, 85),    # Green
-        (0, 0, 170),     # Blue
-        (238, 238, 119), # Yellow
-        (221, 136, 85),  # Orange
-        (102, 68, 0),    # Brown
-        (255, 119, 119), # Light red
-        (51, 51, 51),    # Dark gray
-        (119, 119, 119), # Medium gray
-        (170, 255, 102), # Light green
-        (0, 136, 255),   # Light blue
-        (187, 187, 187)  # Light gray
-    ]
+    y, x = np.mgrid[0:n, 0:n] - (n - 1) / 2.0
+    dist = np.round(np.hypot(x, y), 6).ravel()
+    angle = np.arctan2(y, x).ravel()
+    rank = np.empty(n * n, dtype=np.int32)
+    rank[np.lexsort((angle, dist))] = np.arange(n * n)
+    return ((rank.reshape(n, n) * 256) // (n * n) - 128).astype(np.int16)
+
+
+def _threshold_dither(img_arr: np.ndarray, palette_np: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Add a tiled threshold matrix to the image and map each pixel to a palette index."""
+    height, width, channels = img_arr.shape
+    rows, cols = thresholds.shape
     
-    # ZX Spectrum palette
-    ZX_SPECTRUM_PALETTE = [
-        (0, 0, 0),       # Black
-        (0, 0, 192),     # Blue
-        (192, 0, 0),     # Red
-        (192, 0, 192),   # Magenta
-        (0, 192, 0),     # Green
-        (0, 192, 192),   # Cyan
-        (192, 192, 0),   # Yellow
-        (192, 192, 192), # White
-        (0, 0, 0),       # Bright black
-        (0, 0, 255),     # Bright blue
-        (255, 0, 0),     # Bright red
-        (255, 0, 255),   # Bright magenta
-        (0, 255, 0),     # Bright green
-        (0, 255, 255),   # Bright cyan
-        (255, 255, 0),   # Bright yellow
-        (255, 255, 255)  # Bright white
-    ]
+    # Tile the threshold offsets over the whole image
+    tmap = np.tile(thresholds, (-(-height // rows), -(-width // cols)))[:height, :width, None]
+    noisy = np.clip(img_arr + tmap, 0, 255)
+    
+    # Map every pixel to its palette entry with a single table gather
+    q = noisy >> LUT_SHIFT
+    return _palette_lut(palette_np)[q[..., 0], q[..., 1], q[..., 2]]
+
+
+def bayer_dither(img_arr: np.ndarray, palette_np: np.ndarray) -> np.ndarray:
+    """Apply Bayer matrix dithering, returning an (H, W) uint8 array of palette indices."""
+    return _threshold_dither(img_arr, palette_np, BAYER_THRESHOLD_I16)
+
+
+def ordered_dither(img_arr: np.ndarray, palette_np: np.ndarray, matrix_size: int = 4) -> np.ndarray:
+    """Apply clustered-dot ordered dithering with a matrix_size x matrix_size screen."""
+    return _threshold_dither(img_arr, palette_np, _build_clustered_dot(matrix_size))
+
+
+DITHER_METHODS = {
+    'floyd_steinberg': floyd_steinberg_dither,
+    'bayer': bayer_dither,
+    'ordered': ordered_dither
+}
+
+
+def dither_image(image: Image.Image, palette_np: np.ndarray, dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.0) -> Image.Image:
+    """Apply contrast and the named dithering method, returning a 'P' mode image."""
+    dither = DITHER_METHODS.get(dither_method, ordered_dither)
+    idx = dither(image_to_array(image, contrast_factor), palette_np)
+    return to_indexed_image(idx, palette_np)
+
+
+def convert_to_gameboy_camera(image: Image.Image, dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.5, maintain_aspect: bool = False) -> Image.Image:
+    """Convert image to Game Boy Camera style (4-shade grayscale, 128x112 or fitted within it if maintain_aspect)."""
+    if maintain_aspect:
+        # Fit within the Game Boy Camera resolution; thumbnail() is a no-op for small images
+        resized = image.copy()
+        resized.thumbnail((128, 112), Image.BILINEAR)
+    else:
+        # Resize to Game Boy Camera resolution
+        resized = resize_image(image, 128, 112, maintain_aspect=False)
+    return dither_image(resized, GAMEBOY_PALETTE, dither_method, contrast_factor)
+
+
+def convert_to_dot_matrix(image: Image.Image, width: int = 200, dither_method: str = 'floyd_steinberg', contrast_factor: float = 2.0) -> Image.Image:
+    """Convert image to dot matrix printer style (black and white)."""
+    resized = resize_image(image, width)
+    return dither_image(resized, DOT_MATRIX_PALETTE, dither_method, contrast_factor)
+
+
+def convert_to_retro_color(image: Image.Image, width: int = 320, palette: str = 'cga', dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.2) -> Image.Image:
+    """Convert image to retro color palette style."""
+    color_palette = RETRO_PALETTES.get(palette.lower(), CGA_PALETTE)
+    resized = resize_image(image, width)
+    return dither_image(resized, color_palette, dither_method, contrast_factor)
+
+
+def _as_tuples(palette_np: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Convert a palette array back to a list of (r, g, b) tuples."""
+    return [tuple(color) for color in palette_np.tolist()]
+
+
+class RetroImageProcessor:
+    """Object wrapper over the module-level functions, kept for backward compatibility."""
+    
+    GAMEBOY_PALETTE_NP = GAMEBOY_PALETTE
+    DOT_MATRIX_PALETTE_NP = DOT_MATRIX_PALETTE
+    CGA_PALETTE_NP = CGA_PALETTE
+    APPLE_II_PALETTE_NP = APPLE_II_PALETTE
+    C64_PALETTE_NP = C64_PALETTE
+    ZX_SPECTRUM_PALETTE_NP = ZX_SPECTRUM_PALETTE
+    
+    GAMEBOY_PALETTE = _as_tuples(GAMEBOY_PALETTE_NP)
+    DOT_MATRIX_PALETTE = _as_tuples(DOT_MATRIX_PALETTE_NP)
+    CGA_PALETTE = _as_tuples(CGA_PALETTE_NP)
+    APPLE_II_PALETTE = _as_tuples(APPLE_II_PALETTE_NP)
+    C64_PALETTE = _as_tuples(C64_PALETTE_NP)
+    ZX_SPECTRUM_PALETTE = _as_tuples(ZX_SPECTRUM_PALETTE_NP)
     
     def __init__(self):
-        self.bayer_matrix_4x4 = np.array([
-            [0, 8, 2, 10],
-            [12, 4, 14, 6],
-            [3, 11, 1, 9],
-            [15, 7, 13, 5]
-        ]) / 16.0
+        self.bayer_matrix_4x4 = BAYER_4X4
     
-    def resize_image(self, image: Image.Image, target_width: int, target_height: Optional[int] = None, maintain_aspect: bool = True) -> Image.Image:
-        """Resize image to target dimensions."""
-        if target_height is None:
-            if maintain_aspect:
-                aspect_ratio = image.height / image.width
-                target_height = int(target_width * aspect_ratio)
-            else:
-                target_height = target_width
-        
-        return image.resize((target_width, target_height), Image.LANCZOS)
+    def resize_image(self, image: Image.Image, target_width: int, target_height: Optional[int] = None, maintain_aspect: bool = True, quality: str = 'fast') -> Image.Image:
+        """Resize image to target dimensions; quality='high' uses Lanczos resampling."""
+        return resize_image(image, target_width, target_height, maintain_aspect, quality)
     
     def enhance_contrast(self, image: Image.Image, factor: float = 1.5) -> Image.Image:
         """Enhance image contrast for better dithering results."""
-        enhancer = ImageEnhance.Contrast(image)
-        return enhancer.enhance(factor)
+        return enhance_contrast(image, factor)
     
-    def floyd_steinberg_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]]) -> Image.Image:
-        """Apply Floyd-Steinberg dithering algorithm."""
-        # Convert to RGB if not already
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Convert to numpy array
-        img_array = np.array(image, dtype=np.float64)
-        height, width, channels = img_array.shape
-        
-        # Process each pixel
-        for y in range(height):
-            for x in range(width):
-                old_pixel = img_array[y, x]
-                new_pixel = self._find_closest_color(old_pixel, palette)
-                img_array[y, x] = new_pixel
-                
-                error = old_pixel - new_pixel
-                
-                # Distribute error to neighboring pixels
-                if x + 1 < width:
-                    img_array[y, x + 1] += error * 7/16
-                if y + 1 < height:
-                    if x - 1 >= 0:
-                        img_array[y + 1, x - 1] += error * 3/16
-                    img_array[y + 1, x] += error * 5/16
-                    if x + 1 < width:
-                        img_array[y + 1, x + 1] += error * 1/16
-        
-        # Clip values and convert back to image
-        img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array, 'RGB')
+    def floyd_steinberg_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]], serpentine: bool = True, contrast_factor: float = 1.0) -> Image.Image:
+        """Apply Floyd-Steinberg dithering algorithm, optionally with serpentine scanning."""
+        palette_np = np.asarray(palette, dtype=np.int16)
+        idx = floyd_steinberg_dither(image_to_array(image, contrast_factor), palette_np, serpentine)
+        return to_indexed_image(idx, palette_np)
     
-    def bayer_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]]) -> Image.Image:
+    def bayer_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]], contrast_factor: float = 1.0) -> Image.Image:
         """Apply Bayer matrix dithering."""
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        img_array = np.array(image, dtype=np.float64)
-        height, width, channels = img_array.shape
-        
-        # Apply Bayer matrix threshold
-        for y in range(height):
-            for x in range(width):
-                threshold = self.bayer_matrix_4x4[y % 4, x % 4] * 255
-                pixel = img_array[y, x]
-                
-                # Add threshold noise
-                pixel_with_noise = pixel + (threshold - 127.5)
-                pixel_with_noise = np.clip(pixel_with_noise, 0, 255)
-                
-                # Find closest color
-                new_pixel = self._find_closest_color(pixel_with_noise, palette)
-                img_array[y, x] = new_pixel
-        
-        img_array = np.clip(img_array, 0, 255).astype(np.uint8)
-        return Image.fromarray(img_array, 'RGB')
+        palette_np = np.asarray(palette, dtype=np.int16)
+        idx = bayer_dither(image_to_array(image, contrast_factor), palette_np)
+        return to_indexed_image(idx, palette_np)
     
-    def ordered_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]], matrix_size: int = 4) -> Image.Image:
-        """Apply ordered dithering with custom matrix size."""
-        # For simplicity, use Bayer dithering as base
-        return self.bayer_dither(image, palette)
+    def ordered_dither(self, image: Image.Image, palette: List[Tuple[int, int, int]], matrix_size: int = 4, contrast_factor: float = 1.0) -> Image.Image:
+        """Apply clustered-dot ordered dithering with custom matrix size."""
+        palette_np = np.asarray(palette, dtype=np.int16)
+        idx = ordered_dither(image_to_array(image, contrast_factor), palette_np, matrix_size)
+        return to_indexed_image(idx, palette_np)
     
-    def _find_closest_color(self, pixel: np.ndarray, palette: List[Tuple[int, int, int]]) -> np.ndarray:
-        """Find the closest color in the palette to the given pixel."""
-        min_distance = float('inf')
-        closest_color = palette[0]
-        
-        for color in palette:
-            distance = np.sum((pixel - np.array(color)) ** 2)
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = color
-        
-        return np.array(closest_color, dtype=np.float64)
-    
-    def convert_to_gameboy_camera(self, image: Image.Image, dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.5) -> Image.Image:
-        """Convert image to Game Boy Camera style (128x112, 4-shade grayscale)."""
-        # Resize to Game Boy Camera resolution
-        resized = self.resize_image(image, 128, 112, maintain_aspect=False)
-        
-        # Enhance contrast
-        enhanced = self.enhance_contrast(resized, contrast_factor)
-        
-        # Apply dithering
-        if dither_method == 'floyd_steinberg':
-            return self.floyd_steinberg_dither(enhanced, self.GAMEBOY_PALETTE)
-        elif dither_method == 'bayer':
-            return self.bayer_dither(enhanced, self.GAMEBOY_PALETTE)
-        else:
-            return self.ordered_dither(enhanced, self.GAMEBOY_PALETTE)
+    def convert_to_gameboy_camera(self, image: Image.Image, dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.5, maintain_aspect: bool = False) -> Image.Image:
+        """Convert image to Game Boy Camera style (4-shade grayscale, 128x112 or fitted within it if maintain_aspect)."""
+        return convert_to_gameboy_camera(image, dither_method, contrast_factor, maintain_aspect)
     
     def convert_to_dot_matrix(self, image: Image.Image, width: int = 200, dither_method: str = 'floyd_steinberg', contrast_factor: float = 2.0) -> Image.Image:
         """Convert image to dot matrix printer style (black and white)."""
-        # Resize image
-        resized = self.resize_image(image, width)
-        
-        # Enhance contrast
-        enhanced = self.enhance_contrast(resized, contrast_factor)
-        
-        # Apply dithering
-        if dither_method == 'floyd_steinberg':
-            return self.floyd_steinberg_dither(enhanced, self.DOT_MATRIX_PALETTE)
-        elif dither_method == 'bayer':
-            return self.bayer_dither(enhanced, self.DOT_MATRIX_PALETTE)
-        else:
-            return self.ordered_dither(enhanced, self.DOT_MATRIX_PALETTE)
+        return convert_to_dot_matrix(image, width, dither_method, contrast_factor)
     
     def convert_to_retro_color(self, image: Image.Image, width: int = 320, palette: str = 'cga', dither_method: str = 'floyd_steinberg', contrast_factor: float = 1.2) -> Image.Image:
         """Convert image to retro color palette style."""
-        # Get the appropriate palette
-        palette_map = {
-            'cga': self.CGA_PALETTE,
-            'apple2': self.APPLE_II_PALETTE,
-            'c64': self.C64_PALETTE,
-            'spectrum': self.ZX_SPECTRUM_PALETTE
-        }
-        
-        color_palette = palette_map.get(palette.lower(), self.CGA_PALETTE)
-        
-        # Resize image
-        resized = self.resize_image(image, width)
-        
-        # Enhance contrast slightly
-        enhanced = self.enhance_contrast(resized, contrast_factor)
-        
-        # Apply dithering
-        if dither_method == 'floyd_steinberg':
-            return self.floyd_steinberg_dither(enhanced, color_palette)
-        elif dither_method == 'bayer':
-            return self.bayer_dither(enhanced, color_palette)
-        else:
-            return self.ordered_dither(enhanced, color_palette)
+        return convert_to_retro_color(image, width, palette, dither_method, contrast_factor)
     
     def get_available_palettes(self) -> dict:
         """Return dictionary of available palettes with descriptions."""
-        return {
-            'cga': 'IBM CGA 16-color palette',
-            'apple2': 'Apple II 16-color palette', 
-            'c64': 'Commodore 64 16-color palette',
-            'spectrum': 'ZX Spectrum 16-color palette'
-        }
+        return dict(AVAILABLE_PALETTES)
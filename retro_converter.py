@@ -7,21 +7,53 @@ with various dithering algorithms and color palettes.
 """
 
 import click
+import glob
+import json
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 from PIL import Image
-from image_processor import RetroImageProcessor
+import image_processor
+
+
+# Accepted values for the style, dither and palette options
+STYLES = ['gameboy', 'dotmatrix', 'retro']
+DITHERS = ['floyd_steinberg', 'bayer', 'ordered']
+PALETTES = ['cga', 'apple2', 'c64', 'spectrum']
+
+# Default (width, contrast) for each style when not given explicitly
+STYLE_DEFAULTS = {
+    'gameboy': (128, 1.5),
+    'dotmatrix': (200, 2.0),
+    'retro': (320, 1.2),
+}
+
+# Output formats that store palette ('P' mode) images natively
+PALETTE_EXTENSIONS = {'.png', '.gif', '.bmp', '.tif', '.tiff'}
+
+
+def save_result(result: Image.Image, output_file: str) -> None:
+    """Save a converted image, expanding it to RGB for formats without palette support."""
+    # Create output directory if it doesn't exist
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    if result.mode == 'P' and os.path.splitext(output_file)[1].lower() not in PALETTE_EXTENSIONS:
+        result = result.convert('RGB')
+    result.save(output_file)
 
 
 @click.command()
 @click.argument('input_file', type=click.Path(exists=True))
 @click.argument('output_file', type=click.Path())
 @click.option('--style', '-s', 
-              type=click.Choice(['gameboy', 'dotmatrix', 'retro']), 
+              type=click.Choice(STYLES), 
               default='gameboy',
               help='Output style: gameboy (Game Boy Camera), dotmatrix (black/white), retro (color)')
 @click.option('--dither', '-d',
-              type=click.Choice(['floyd_steinberg', 'bayer', 'ordered']),
+              type=click.Choice(DITHERS),
               default='floyd_steinberg',
               help='Dithering algorithm to use')
 @click.option('--width', '-w',
@@ -37,16 +69,19 @@ from image_processor import RetroImageProcessor
               default=None,
               help='Contrast enhancement factor (default varies by style)')
 @click.option('--palette', '-p',
-              type=click.Choice(['cga', 'apple2', 'c64', 'spectrum']),
+              type=click.Choice(PALETTES),
               default='cga',
               help='Color palette for retro style')
+@click.option('--keep-aspect',
+              is_flag=True,
+              help='Game Boy style: fit within 128x112 keeping the aspect ratio instead of stretching')
 @click.option('--preview', 
               is_flag=True,
               help='Show image preview after processing (requires display)')
 @click.option('--verbose', '-v',
               is_flag=True,
               help='Verbose output')
-def convert_image(input_file, output_file, style, dither, width, height, contrast, palette, preview, verbose):
+def convert_image(input_file, output_file, style, dither, width, height, contrast, palette, keep_aspect, preview, verbose):
     """
     Convert INPUT_FILE to retro style and save as OUTPUT_FILE.
     
@@ -69,72 +104,39 @@ def convert_image(input_file, output_file, style, dither, width, height, contras
         click.echo(f"Loading image: {input_file}")
     
     try:
-        # Load the image
-        with Image.open(input_file) as img:
-            processor = RetroImageProcessor()
-            
-            # Set default parameters based on style
+        width, contrast = resolve_style_defaults(style, width, contrast)
+        
+        if verbose:
             if style == 'gameboy':
-                if width is None:
-                    width = 128
-                if height is None:
-                    height = 112
-                if contrast is None:
-                    contrast = 1.5
-                    
-                if verbose:
-                    click.echo(f"Converting to Game Boy Camera style...")
-                    click.echo(f"Resolution: {width}x{height}, Contrast: {contrast}, Dither: {dither}")
-                
-                result = processor.convert_to_gameboy_camera(img, dither, contrast)
-                
+                click.echo(f"Converting to Game Boy Camera style...")
+                fit = " (fitted, aspect preserved)" if keep_aspect else ""
+                click.echo(f"Resolution: {width}x{height or 112}{fit}, Contrast: {contrast}, Dither: {dither}")
             elif style == 'dotmatrix':
-                if width is None:
-                    width = 200
-                if contrast is None:
-                    contrast = 2.0
-                    
-                if verbose:
-                    click.echo(f"Converting to dot matrix printer style...")
-                    click.echo(f"Width: {width}, Contrast: {contrast}, Dither: {dither}")
-                
-                result = processor.convert_to_dot_matrix(img, width, dither, contrast)
+                click.echo(f"Converting to dot matrix printer style...")
+                click.echo(f"Width: {width}, Contrast: {contrast}, Dither: {dither}")
+            else:
+                click.echo(f"Converting to retro computer style...")
+                click.echo(f"Width: {width}, Palette: {palette}, Contrast: {contrast}, Dither: {dither}")
+        
+        result, original_size = load_and_convert(input_file, style, dither, width, contrast, palette, keep_aspect)
+        
+        if verbose:
+            click.echo(f"Saving result to: {output_file}")
+        
+        save_result(result, output_file)
+        
+        if verbose:
+            click.echo(f"✓ Conversion complete! Saved as {output_file}")
+            click.echo(f"Original size: {original_size[0]}x{original_size[1]}")
+            click.echo(f"Output size: {result.width}x{result.height}")
+        
+        # Show preview if requested
+        if preview:
+            try:
+                result.show()
+            except Exception as e:
+                click.echo(f"Warning: Could not show preview - {e}", err=True)
                 
-            elif style == 'retro':
-                if width is None:
-                    width = 320
-                if contrast is None:
-                    contrast = 1.2
-                    
-                if verbose:
-                    click.echo(f"Converting to retro computer style...")
-                    click.echo(f"Width: {width}, Palette: {palette}, Contrast: {contrast}, Dither: {dither}")
-                
-                result = processor.convert_to_retro_color(img, width, palette, dither, contrast)
-            
-            # Save the result
-            if verbose:
-                click.echo(f"Saving result to: {output_file}")
-            
-            # Create output directory if it doesn't exist
-            output_dir = os.path.dirname(output_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            result.save(output_file)
-            
-            if verbose:
-                click.echo(f"✓ Conversion complete! Saved as {output_file}")
-                click.echo(f"Original size: {img.width}x{img.height}")
-                click.echo(f"Output size: {result.width}x{result.height}")
-            
-            # Show preview if requested
-            if preview:
-                try:
-                    result.show()
-                except Exception as e:
-                    click.echo(f"Warning: Could not show preview - {e}", err=True)
-                    
     except FileNotFoundError:
         click.echo(f"Error: Input file '{input_file}' not found.", err=True)
         sys.exit(1)
@@ -143,6 +145,74 @@ def convert_image(input_file, output_file, style, dither, width, height, contras
         sys.exit(1)
 
 
+def resolve_style_defaults(style: str, width: Optional[int], contrast: Optional[float]) -> Tuple[int, float]:
+    """Fill in the style's default width and contrast where they were not given."""
+    default_width, default_contrast = STYLE_DEFAULTS[style]
+    return (default_width if width is None else width,
+            default_contrast if contrast is None else contrast)
+
+
+def load_and_convert(input_file: str, style: str = 'gameboy',
+                     dither: str = 'floyd_steinberg', width: Optional[int] = None, contrast: Optional[float] = None,
+                     palette: str = 'cga', keep_aspect: bool = False) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Load and convert a single image, returning the result and the source size."""
+    width, contrast = resolve_style_defaults(style, width, contrast)
+    
+    with Image.open(input_file) as img:
+        if style == 'gameboy':
+            result = image_processor.convert_to_gameboy_camera(img, dither, contrast, keep_aspect)
+        elif style == 'dotmatrix':
+            result = image_processor.convert_to_dot_matrix(img, width, dither, contrast)
+        else:
+            result = image_processor.convert_to_retro_color(img, width, palette, dither, contrast)
+        return result, img.size
+
+
+def convert_file(input_file: str, output_file: str, style: str = 'gameboy',
+                 dither: str = 'floyd_steinberg', width: Optional[int] = None, contrast: Optional[float] = None,
+                 palette: str = 'cga', keep_aspect: bool = False) -> Image.Image:
+    """Load, convert and save a single image, returning the converted image."""
+    result, _ = load_and_convert(input_file, style, dither, width, contrast, palette, keep_aspect)
+    save_result(result, output_file)
+    return result
+
+
+def find_output_collisions(input_files: Sequence[str], output_files: Sequence[str]) -> Dict[str, List[str]]:
+    """Map each output path written by more than one input to those inputs."""
+    by_output = {}
+    for input_file, output_file in zip(input_files, output_files):
+        key = os.path.normcase(os.path.abspath(output_file))
+        by_output.setdefault(key, (output_file, []))[1].append(input_file)
+    return {output_file: sources for output_file, sources in by_output.values() if len(sources) > 1}
+
+
+def convert_many(input_files: Sequence[str], output_files: Sequence[str], style: str = 'gameboy',
+                 dither: str = 'floyd_steinberg', width: Optional[int] = None, contrast: Optional[float] = None,
+                 palette: str = 'cga', keep_aspect: bool = False,
+                 max_workers: Optional[int] = None) -> List[Optional[Exception]]:
+    """
+    Convert several images concurrently.
+    
+    Each file runs on its own thread; the dithering kernel releases the GIL,
+    so independent images are dithered in parallel. A failing file does not
+    stop the others: the result holds, per input in order, None on success
+    or the exception raised for that file.
+    """
+    collisions = find_output_collisions(input_files, output_files)
+    if collisions:
+        raise ValueError(f"Output path '{next(iter(collisions))}' is used by more than one input")
+    
+    def worker(paths):
+        try:
+            convert_file(paths[0], paths[1], style, dither, width, contrast, palette, keep_aspect)
+        except Exception as e:
+            return e
+        return None
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(worker, zip(input_files, output_files)))
+
+
 @click.group()
 @click.version_option(version='1.0.0')
 def cli():
@@ -164,7 +234,7 @@ def info():
     click.echo("Dithering Algorithms:")
     click.echo("  floyd_steinberg - High quality, good for photos")
     click.echo("  bayer          - Fast, good for graphics")
-    click.echo("  ordered        - Alternative ordered dithering")
+    click.echo("  ordered        - Clustered-dot ordered dithering (halftone look)")
     click.echo()
     click.echo("Color Palettes (for retro style):")
     click.echo("  cga            - IBM CGA 16-color palette")
@@ -176,6 +246,161 @@ def info():
     click.echo("  retro_converter.py photo.jpg gameboy.png --style gameboy")
     click.echo("  retro_converter.py photo.jpg matrix.png --style dotmatrix --width 400")
     click.echo("  retro_converter.py photo.jpg retro.png --style retro --palette cga")
+    click.echo("  retro_converter.py batch 'photos/*.jpg' out/ --style gameboy")
+
+
+@cli.command()
+@click.argument('input_glob')
+@click.argument('output_dir', type=click.Path(file_okay=False))
+@click.option('--style', '-s',
+              type=click.Choice(STYLES),
+              default='gameboy',
+              help='Output style: gameboy (Game Boy Camera), dotmatrix (black/white), retro (color)')
+@click.option('--dither', '-d',
+              type=click.Choice(DITHERS),
+              default='floyd_steinberg',
+              help='Dithering algorithm to use')
+@click.option('--width', '-w',
+              type=int,
+              default=None,
+              help='Output width in pixels (auto-calculated if not specified)')
+@click.option('--contrast', '-c',
+              type=float,
+              default=None,
+              help='Contrast enhancement factor (default varies by style)')
+@click.option('--palette', '-p',
+              type=click.Choice(PALETTES),
+              default='cga',
+              help='Color palette for retro style')
+@click.option('--keep-aspect',
+              is_flag=True,
+              help='Game Boy style: fit within 128x112 keeping the aspect ratio instead of stretching')
+@click.option('--format', '-f', 'output_format',
+              default='png',
+              help='Output file extension')
+@click.option('--jobs', '-j',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Number of images to convert in parallel (default: CPU count)')
+@click.option('--verbose', '-v',
+              is_flag=True,
+              help='Verbose output')
+def batch(input_glob, output_dir, style, dither, width, contrast, palette, keep_aspect, output_format, jobs, verbose):
+    """
+    Convert every file matching INPUT_GLOB into OUTPUT_DIR.
+    
+    Quote the pattern so the shell does not expand it.
+    
+    \b
+    # Convert a folder of photos to Game Boy Camera style
+    python retro_converter.py batch 'photos/*.jpg' gameboy/ --style gameboy
+    """
+    input_files = sorted(f for f in glob.glob(input_glob) if os.path.isfile(f))
+    if not input_files:
+        click.echo(f"Error: No files match '{input_glob}'.", err=True)
+        sys.exit(1)
+    
+    extension = output_format.lstrip('.')
+    output_files = [
+        os.path.join(output_dir, f"{os.path.splitext(os.path.basename(f))[0]}.{extension}")
+        for f in input_files
+    ]
+    
+    # Inputs that differ only by extension would overwrite each other
+    collisions = find_output_collisions(input_files, output_files)
+    if collisions:
+        for output_file, sources in collisions.items():
+            click.echo(f"Error: {', '.join(sources)} would be saved to the same file {output_file}", err=True)
+        sys.exit(1)
+    
+    if verbose:
+        click.echo(f"Converting {len(input_files)} files with {jobs or os.cpu_count()} workers...")
+    
+    errors = convert_many(input_files, output_files, style, dither, width, contrast, palette, keep_aspect,
+                          max_workers=jobs or os.cpu_count())
+    
+    failed = 0
+    for input_file, output_file, error in zip(input_files, output_files, errors):
+        if error is not None:
+            failed += 1
+            click.echo(f"✗ {input_file}: {error}", err=True)
+        elif verbose:
+            click.echo(f"✓ {output_file}")
+    
+    if failed:
+        click.echo(f"Error: {failed} of {len(input_files)} files failed to convert.", err=True)
+        sys.exit(1)
+
+
+def parse_job(job: dict) -> dict:
+    """Validate a serve job and return keyword arguments for convert_file."""
+    if not isinstance(job, dict):
+        raise ValueError("job must be a JSON object")
+    
+    for key in ('input', 'output'):
+        if key not in job:
+            raise ValueError(f"missing key '{key}'")
+        if not isinstance(job[key], str):
+            raise ValueError(f"'{key}' must be a string")
+    
+    options = {
+        'input_file': job['input'],
+        'output_file': job['output'],
+        'style': job.get('style', 'gameboy'),
+        'dither': job.get('dither', 'floyd_steinberg'),
+        'width': job.get('width'),
+        'contrast': job.get('contrast'),
+        'palette': job.get('palette', 'cga'),
+        'keep_aspect': job.get('keep_aspect', False),
+    }
+    
+    for name, allowed in (('style', STYLES), ('dither', DITHERS), ('palette', PALETTES)):
+        if options[name] not in allowed:
+            raise ValueError(f"unknown {name} {options[name]!r}")
+    
+    if options['width'] is not None and (not isinstance(options['width'], int) or isinstance(options['width'], bool)):
+        raise ValueError("'width' must be an integer")
+    if options['contrast'] is not None and (not isinstance(options['contrast'], (int, float)) or isinstance(options['contrast'], bool)):
+        raise ValueError("'contrast' must be a number")
+    if not isinstance(options['keep_aspect'], bool):
+        raise ValueError("'keep_aspect' must be true or false")
+    
+    return options
+
+
+@cli.command()
+def serve():
+    """
+    Convert images from JSON jobs read line by line on stdin.
+    
+    Keeps one process alive so imports and kernel warmup are paid once.
+    Each line is an object with "input" and "output" keys and optional
+    "style", "dither", "width", "contrast", "palette" and "keep_aspect"
+    keys. One JSON status line is written to stdout per input line, in
+    order; error statuses repeat the job's "input" and "output" when they
+    could be read.
+    
+    \b
+    echo '{"input": "photo.jpg", "output": "out.png", "style": "gameboy"}' | python retro_converter.py serve
+    """
+    for line in sys.stdin:
+        job = None
+        try:
+            if not line.strip():
+                raise ValueError("empty job")
+            job = json.loads(line)
+            options = parse_job(job)
+            convert_file(**options)
+            status = {'status': 'ok', 'input': options['input_file'], 'output': options['output_file']}
+        except Exception as e:
+            status = {'status': 'error', 'error': str(e)}
+            if isinstance(job, dict):
+                for key in ('input', 'output'):
+                    if isinstance(job.get(key), str):
+                        status[key] = job[key]
+        
+        click.echo(json.dumps(status))
+        sys.stdout.flush()
 
 
 # Add the convert command to the CLI group
@@ -188,7 +413,7 @@ if __name__ == '__main__':
         cli(['--help'])
     else:
         # Check if first argument is a filename (not a subcommand)
-        if sys.argv[1] not in ['convert', 'info', '--help', '--version']:
+        if sys.argv[1] not in ['convert', 'info', 'batch', 'serve', '--help', '--version']:
             # Insert 'convert' as the subcommand
             sys.argv.insert(1, 'convert')
         cli()